@@ -5,7 +5,6 @@ Kalpit Pvt Ltd - AI Intern Hiring Assignment
 """
 
 import os
-import sys
 import warnings
 # Suppress all warnings
 warnings.filterwarnings("ignore")
@@ -13,62 +12,463 @@ warnings.filterwarnings("ignore")
 # Disable ChromaDB telemetry to remove those warning messages
 os.environ['ANONYMIZED_TELEMETRY'] = 'False'
 
-try:
-    from langchain.document_loaders import TextLoader
-    from langchain.text_splitter import CharacterTextSplitter
-    from langchain.vectorstores import Chroma
-    from langchain.llms import Ollama
-    from langchain.embeddings import OllamaEmbeddings
-    from langchain.chains import RetrievalQA
-    from langchain.prompts import PromptTemplate
+import asyncio
+import atexit
+import functools
+import glob
+import hashlib
+import json
+import pathlib
+import pickle
+import shelve
+import shutil
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Optional
+
+# LangChain, chromadb and friends are imported on first use so the
+# welcome screen and Ollama check don't pay for them
+_IMPORTED = False
+
+OLLAMA_BASE_URL = "http://localhost:11434"
+COLLECTION_NAME = "ambedkar"
+# HNSW index tuned for a small single-speech corpus
+HNSW_SETTINGS = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 100,
+    "hnsw:search_ef": 40
+}
+LLM_MODEL = "mistral:7b-instruct-q4_K_M"  # 4-bit quantized for faster decoding
+EMBEDDING_MODEL = "nomic-embed-text"
+EMBEDDING_MODEL_FILE = "embedding_model.txt"
+EMBEDDING_MATRIX_FILE = "embeddings.npy"
+DOCUMENTS_FILE = "documents.json"
+CHROMA_DB_FILE = "chroma.sqlite3"  # Marks a directory as a chromadb store
+QUERY_CACHE_FILE = "./query_emb_cache.pkl"
+KEEP_ALIVE = "30m"  # Keep models loaded in Ollama between questions
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 50
+MIN_CHUNK_SIZE = 200  # Smaller chunks get merged into a neighbour
+MAX_MERGED_CHUNK_SIZE = 1150
+# Generation settings for Mistral; a single excerpt plus the short prompt fits in num_ctx
+LLM_OPTIONS = {
+    "temperature": 0.1,
+    "num_ctx": 1024,
+    "num_predict": 200,  # Cap answer length to bound decoding time
+    "top_p": 0.9,
+    "repeat_penalty": 1.1
+}
+PREFETCH_DELAY = 0.4  # Seconds of typing pause before retrieval is prefetched
+
+# Short prompt so the excerpt and answer fit in a small context window
+PROMPT_TEMPLATE = """Answer the question using ONLY this excerpt from Dr. B.R. Ambedkar's "Annihilation of Caste".
+If the excerpt does not cover it, say so. Be concise and true to Ambedkar's arguments.
+
+EXCERPT: {context}
+
+QUESTION: {question}
+ANSWER:"""
+
+def import_rag_dependencies():
+    """Import the heavy RAG libraries once, reporting anything missing"""
+    global _IMPORTED
+    if _IMPORTED:
+        return True
+    
+    try:
+        import chromadb  # noqa: F401
+        import httpx  # noqa: F401
+        import numpy  # noqa: F401
+        import requests  # noqa: F401
+        from prompt_toolkit import PromptSession  # noqa: F401
+        from langchain.text_splitter import RecursiveCharacterTextSplitter  # noqa: F401
+        from langchain.schema import Document  # noqa: F401
+        from langchain.llms import Ollama  # noqa: F401
+        from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler  # noqa: F401
+    except ImportError as e:
+        print(f"❌ Import error: {e}")
+        return False
+    
+    _IMPORTED = True
     print("✅ All modules imported successfully")
-except ImportError as e:
-    print(f"❌ Import error: {e}")
-    sys.exit(1)
+    return True
+
+class OllamaBatchEmbeddings:
+    """Ollama embeddings that send all texts in one /api/embed request"""
+
+    def __init__(self, model=EMBEDDING_MODEL, base_url=OLLAMA_BASE_URL, max_concurrency=8,
+                 keep_alive=KEEP_ALIVE):
+        self.model = model
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+        self.max_concurrency = max_concurrency
+        self.batch_supported = True
+
+    def embed_documents(self, texts):
+        """Embed a list of texts with a single HTTP round-trip"""
+        import requests
+        
+        texts = list(texts)
+        if self.batch_supported:
+            response = requests.post(
+                f"{self.base_url}/api/embed",
+                json={"model": self.model, "input": texts, "keep_alive": self.keep_alive},
+                timeout=300
+            )
+            # Older Ollama servers only expose the per-text /api/embeddings endpoint,
+            # but newer ones also answer 404 when the model hasn't been pulled
+            if response.status_code == 404 and not self._is_model_error(response):
+                self.batch_supported = False
+            else:
+                if response.status_code >= 400 and self._is_model_error(response):
+                    raise RuntimeError(f"Ollama embedding failed: {response.json()['error']}")
+                response.raise_for_status()
+                return response.json()["embeddings"]
+        return asyncio.run(self._embed_all(texts))
+
+    @staticmethod
+    def _is_model_error(response):
+        """Tell an Ollama JSON error (e.g. model not found) from a missing route"""
+        try:
+            return "error" in response.json()
+        except ValueError:
+            return False
+
+    async def _embed_all(self, texts):
+        """Embed texts concurrently through the legacy /api/embeddings endpoint"""
+        import httpx
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=60) as client:
+            async def embed_one(text):
+                async with semaphore:
+                    response = await client.post(
+                        "/api/embeddings",
+                        json={"model": self.model, "prompt": text, "keep_alive": self.keep_alive}
+                    )
+                    response.raise_for_status()
+                    return response.json()["embedding"]
+            
+            return await asyncio.gather(*(embed_one(text) for text in texts))
+
+    def embed_query(self, text):
+        """Embed a question through the same endpoint as the chunks"""
+        return self.embed_documents([text])[0]
+
+class CachedOllamaEmbeddings(OllamaBatchEmbeddings):
+    """Batch embeddings with an LRU cache of question vectors saved across runs"""
+
+    def __init__(self, cache_path=QUERY_CACHE_FILE, maxsize=1024, **kwargs):
+        super().__init__(**kwargs)
+        self.cache_path = cache_path
+        self.maxsize = maxsize
+        self.query_cache = self._load_cache()
+        # Questions are also embedded from the prefetch thread
+        self.cache_lock = threading.Lock()
+        atexit.register(self.save_cache)
+
+    def embed_query(self, text, cache=True):
+        """Return the cached vector for a repeated question, embedding it otherwise.
+        
+        With cache=False a new vector is not stored, so throwaway text such as a
+        half-typed question doesn't evict real questions from the saved cache.
+        """
+        key = (self.model, text.strip().lower())
+        with self.cache_lock:
+            if key in self.query_cache:
+                self.query_cache.move_to_end(key)
+                return self.query_cache[key]
+        
+        vector = super().embed_query(key[1])
+        if not cache:
+            return vector
+        with self.cache_lock:
+            self.query_cache[key] = vector
+            if len(self.query_cache) > self.maxsize:
+                self.query_cache.popitem(last=False)
+        return vector
+
+    def _load_cache(self):
+        """Load previously saved question vectors, starting empty on any problem"""
+        try:
+            with open(self.cache_path, "rb") as f:
+                return OrderedDict(pickle.load(f))
+        except Exception:
+            return OrderedDict()
+
+    def save_cache(self):
+        """Write the question vectors to disk so the next session can reuse them"""
+        try:
+            with self.cache_lock, open(self.cache_path, "wb") as f:
+                pickle.dump(self.query_cache, f)
+        except Exception as e:
+            print(f"⚠️ Could not save query embedding cache: {e}")
+
+def merge_tiny_chunks(chunks, min_size=MIN_CHUNK_SIZE, max_size=MAX_MERGED_CHUNK_SIZE):
+    """Greedily merge chunks shorter than min_size into their neighbour"""
+    from langchain.schema import Document
+    
+    merged = []
+    for chunk in chunks:
+        if merged:
+            previous = merged[-1]
+            is_tiny = len(chunk.page_content) < min_size or len(previous.page_content) < min_size
+            combined = previous.page_content + "\n" + chunk.page_content
+            if is_tiny and len(combined) <= max_size:
+                merged[-1] = Document(page_content=combined, metadata=previous.metadata)
+                continue
+        merged.append(chunk)
+    return merged
+
+def maximal_marginal_relevance(query_vector, vectors, k, lambda_mult=0.5):
+    """Pick k row indices balancing similarity to the query against redundancy"""
+    import numpy as np
+    
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    query_vector = query_vector / np.linalg.norm(query_vector)
+    query_sims = vectors @ query_vector
+    pairwise_sims = vectors @ vectors.T
+    
+    selected = [int(np.argmax(query_sims))]
+    available = np.ones(len(vectors), dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < min(k, len(vectors)):
+        redundancy = pairwise_sims[:, selected].max(axis=1)
+        scores = lambda_mult * query_sims - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+    return selected
+
+class MMRRetriever:
+    """Retriever over an in-memory embedding matrix with NumPy MMR re-ranking"""
+
+    def __init__(self, vectors, documents, embeddings, k=1, fetch_k=20, lambda_mult=0.5):
+        self.vectors = vectors  # Unit-length float16 rows, memory-mapped from disk
+        self.documents = documents
+        self.embeddings = embeddings
+        self.k = k
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
+
+    def invoke(self, query, cache_query=True):
+        """Return the k most relevant, mutually diverse documents for a query"""
+        import numpy as np
+        
+        if len(self.documents) == 0:
+            return []
+        
+        query_vector = np.asarray(self.embeddings.embed_query(query, cache=cache_query), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector)
+        sims = self.vectors @ query_vector.astype(self.vectors.dtype)
+        
+        fetch_k = min(self.fetch_k, len(sims))
+        candidates = np.argpartition(-sims, fetch_k - 1)[:fetch_k]
+        candidate_vectors = np.asarray(self.vectors[candidates], dtype=np.float32)
+        selected = maximal_marginal_relevance(query_vector, candidate_vectors, self.k, self.lambda_mult)
+        return [self.documents[candidates[i]] for i in selected]
+
+@functools.lru_cache(maxsize=None)
+def _resident_ollama_class():
+    """Build the Ollama subclass once, on first use, so LangChain loads lazily"""
+    from langchain.llms import Ollama
+    
+    class ResidentOllama(Ollama):
+        """Ollama LLM that keeps the model loaded between questions and can cap answer length"""
+
+        keep_alive: str = KEEP_ALIVE
+        num_predict: Optional[int] = None
+
+        @property
+        def _default_params(self):
+            params = super()._default_params
+            options = dict(params.get("options") or {})
+            if self.num_predict is not None:
+                options["num_predict"] = self.num_predict
+            return {**params, "options": options, "keep_alive": self.keep_alive}
+    
+    return ResidentOllama
+
+def create_llm(keep_alive=KEEP_ALIVE, num_predict=None, **kwargs):
+    """Create the Ollama LLM, adding the options the pinned LangChain wrapper lacks"""
+    return _resident_ollama_class()(keep_alive=keep_alive, num_predict=num_predict, **kwargs)
 
 class AmbedkarQASystem:
-    def __init__(self, data_path="speech.txt", persist_directory="./chroma_db"):
+    # Collections already opened in this process, keyed by persist directory
+    _collection_cache = {}
+    
+    def __init__(self, data_path="speech.txt", persist_directory="./chroma_db",
+                 answer_cache_path="./answer_cache"):
         self.data_path = data_path
         self.persist_directory = persist_directory
-        self.qa_chain = None
-        self.vector_store = None
+        self.answer_cache_path = answer_cache_path
+        self.answer_fingerprint = None
+        self.collection = None
+        self.retriever = None
+        self.llm = None
+        # Background retrieval for the text the user is typing
+        self.prefetch_job = None
+        self.prefetch_timer = None
+        self.prefetch_lock = threading.Lock()
+        self.embedding_model_file = os.path.join(persist_directory, EMBEDDING_MODEL_FILE)
         
     def load_and_process_documents(self):
         """Load and split the document"""
+        from langchain.schema import Document
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        
         print("📖 Loading and processing Ambedkar's speech...")
         try:
-            loader = TextLoader(self.data_path, encoding='utf-8')
-            documents = loader.load()
+            # A single file needs no loader; build the Document directly
+            text = pathlib.Path(self.data_path).read_text(encoding='utf-8')
+            documents = [Document(page_content=text, metadata={"source": self.data_path})]
             
-            text_splitter = CharacterTextSplitter(
-                chunk_size=500,  # Increased for better context
-                chunk_overlap=100,
-                separator="\n"
+            # Split on paragraphs, then lines, then sentences before falling back to words
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP,
+                separators=["\n\n", "\n", ". ", " ", ""]
             )
             
-            chunks = text_splitter.split_documents(documents)
+            chunks = merge_tiny_chunks(text_splitter.split_documents(documents))
+            
+            # Drop repeated chunks so identical text is only embedded once
+            seen = set()
+            unique_chunks = []
+            for chunk in chunks:
+                digest = hashlib.sha256(chunk.page_content.encode('utf-8')).digest()
+                if digest not in seen:
+                    seen.add(digest)
+                    unique_chunks.append(chunk)
+            chunks = unique_chunks
             print(f"✅ Speech processed into {len(chunks)} meaningful chunks")
             return chunks
         except Exception as e:
             print(f"❌ Error loading document: {e}")
             return None
     
+    def warm_up_models(self, embeddings):
+        """Load the LLM and embedding model now so the first question doesn't wait"""
+        import requests
+        
+        print("🔥 Warming up models...")
+        try:
+            # A generate request without a prompt only loads the model. Send the same
+            # options as real answers, since a different num_ctx makes Ollama reload it
+            requests.post(
+                f"{OLLAMA_BASE_URL}/api/generate",
+                json={"model": LLM_MODEL, "keep_alive": KEEP_ALIVE, "options": LLM_OPTIONS},
+                timeout=300
+            ).raise_for_status()
+            embeddings.embed_documents(["warm"])
+        except Exception as e:
+            print(f"⚠️ Model warm-up skipped: {e}")
+    
+    def discard_stale_vector_store(self):
+        """Remove a knowledge base built with a different embedding model"""
+        if not os.path.exists(self.persist_directory):
+            return
+        
+        stored_model = None
+        if os.path.exists(self.embedding_model_file):
+            with open(self.embedding_model_file, encoding='utf-8') as f:
+                stored_model = f.read().strip()
+        
+        if stored_model == EMBEDDING_MODEL:
+            return
+        if stored_model is None:
+            print(f"♻️ No embedding model recorded for the knowledge base, rebuilding for '{EMBEDDING_MODEL}'...")
+        else:
+            print(f"♻️ Knowledge base was built with '{stored_model}', rebuilding for '{EMBEDDING_MODEL}'...")
+        
+        # Only wipe a directory chromadb owns; elsewhere remove just the files written here
+        if os.path.exists(os.path.join(self.persist_directory, CHROMA_DB_FILE)):
+            shutil.rmtree(self.persist_directory)
+            return
+        for name in (EMBEDDING_MODEL_FILE, EMBEDDING_MATRIX_FILE, DOCUMENTS_FILE):
+            path = os.path.join(self.persist_directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def save_embedding_matrix(self, vectors, texts, metadatas):
+        """Store unit-length float16 chunk vectors and their texts next to the collection"""
+        import numpy as np
+        
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.save(os.path.join(self.persist_directory, EMBEDDING_MATRIX_FILE), matrix.astype(np.float16))
+        
+        documents = [
+            {"page_content": text, "metadata": metadata or {}}
+            for text, metadata in zip(texts, metadatas)
+        ]
+        with open(os.path.join(self.persist_directory, DOCUMENTS_FILE), "w", encoding='utf-8') as f:
+            json.dump(documents, f)
+    
+    def load_embedding_matrix(self):
+        """Memory-map the chunk vectors, exporting them from chromadb if needed"""
+        import numpy as np
+        from langchain.schema import Document
+        
+        matrix_path = os.path.join(self.persist_directory, EMBEDDING_MATRIX_FILE)
+        documents_path = os.path.join(self.persist_directory, DOCUMENTS_FILE)
+        if not (os.path.exists(matrix_path) and os.path.exists(documents_path)):
+            stored = self.collection.get(include=["embeddings", "documents", "metadatas"])
+            self.save_embedding_matrix(stored["embeddings"], stored["documents"], stored["metadatas"])
+        
+        with open(documents_path, encoding='utf-8') as f:
+            documents = [Document(**document) for document in json.load(f)]
+        return np.load(matrix_path, mmap_mode="r"), documents
+    
+    def compute_answer_fingerprint(self):
+        """Hash everything a cached answer depends on: prompt, models, options and corpus"""
+        settings = json.dumps({
+            "prompt": PROMPT_TEMPLATE,
+            "llm_model": LLM_MODEL,
+            "llm_options": LLM_OPTIONS,
+            "embedding_model": EMBEDDING_MODEL
+        }, sort_keys=True)
+        digest = hashlib.sha256(settings.encode('utf-8'))
+        digest.update(pathlib.Path(self.persist_directory, DOCUMENTS_FILE).read_bytes())
+        return digest.hexdigest()[:16]
+    
+    def open_collection(self):
+        """Open the chromadb collection once per process and reuse it afterwards"""
+        import chromadb
+        
+        collection = self._collection_cache.get(self.persist_directory)
+        if collection is None:
+            self.discard_stale_vector_store()
+            # Talk to chromadb directly; vectors are always supplied, so no embedding function
+            client = chromadb.PersistentClient(path=self.persist_directory)
+            collection = client.get_or_create_collection(
+                COLLECTION_NAME,
+                metadata=HNSW_SETTINGS,
+                embedding_function=None
+            )
+            self._collection_cache[self.persist_directory] = collection
+        return collection
+    
     def setup_system(self):
         """Setup the complete RAG system"""
         print("🔧 Initializing Q&A System...")
+        if not import_rag_dependencies():
+            return False
+        from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
         
         try:
-            # Use Ollama for embeddings (consistent with LLM)
+            # Use a dedicated Ollama embedding model instead of the 7B LLM
             print("🔄 Loading embeddings model...")
-            embeddings = OllamaEmbeddings(model="mistral")
+            embeddings = CachedOllamaEmbeddings(model=EMBEDDING_MODEL)
             
             # Check if we already have a vector store
-            if os.path.exists(self.persist_directory) and os.listdir(self.persist_directory):
+            self.collection = self.open_collection()
+            if self.collection.count() > 0:
                 print("📚 Loading existing knowledge base...")
-                self.vector_store = Chroma(
-                    persist_directory=self.persist_directory,
-                    embedding_function=embeddings
-                )
             else:
                 print("📝 Processing speech for the first time...")
                 chunks = self.load_and_process_documents()
@@ -76,47 +476,40 @@ class AmbedkarQASystem:
                     return False
                 
                 print("💾 Creating knowledge base...")
-                self.vector_store = Chroma.from_documents(
-                    documents=chunks,
-                    embedding=embeddings,
-                    persist_directory=self.persist_directory
+                # Embed every chunk in one batch request instead of one call per chunk
+                texts = [chunk.page_content for chunk in chunks]
+                vectors = embeddings.embed_documents(texts)
+                
+                # Insert every chunk in one add() call, i.e. a single write to the store
+                self.collection.add(
+                    ids=[f"c{i}" for i in range(len(chunks))],
+                    documents=texts,
+                    metadatas=[chunk.metadata for chunk in chunks],
+                    embeddings=vectors
                 )
+                self.save_embedding_matrix(vectors, texts, [chunk.metadata for chunk in chunks])
+                with open(self.embedding_model_file, "w", encoding='utf-8') as f:
+                    f.write(EMBEDDING_MODEL)
             
-            # Setup the QA chain with Mistral
+            # Setup Mistral for answering
             print("🤖 Initializing Mistral 7B for answering...")
-            llm = Ollama(model="mistral", temperature=0.1)
-            
-            # Improved prompt for better answers
-            prompt_template = """You are an expert assistant analyzing Dr. B.R. Ambedkar's speech "Annihilation of Caste". 
-Use the following excerpt from the speech to answer the question. Be precise and stay true to Ambedkar's ideas.
-
-EXCERPT FROM SPEECH:
-{context}
-
-QUESTION: {question}
-
-INSTRUCTIONS:
-1. Answer based ONLY on the provided excerpt
-2. If the excerpt doesn't contain relevant information, say so
-3. Be concise and accurate
-4. Focus on Ambedkar's key arguments
-
-ANSWER:"""
-            
-            PROMPT = PromptTemplate(
-                template=prompt_template, 
-                input_variables=["context", "question"]
+            # Print answer tokens as Mistral generates them
+            self.llm = create_llm(
+                model=LLM_MODEL,
+                keep_alive=KEEP_ALIVE,
+                callbacks=[StreamingStdOutCallbackHandler()],
+                **LLM_OPTIONS
             )
+            self.warm_up_models(embeddings)
             
-            self.qa_chain = RetrievalQA.from_chain_type(
-                llm=llm,
-                chain_type="stuff",
-                retriever=self.vector_store.as_retriever(
-                    search_type="similarity",
-                    search_kwargs={"k": 1}  # Reduced to avoid the warning
-                ),
-                chain_type_kwargs={"prompt": PROMPT},
-                return_source_documents=False
+            # Questions are matched against the memory-mapped matrix, not chromadb
+            vectors, documents = self.load_embedding_matrix()
+            self.answer_fingerprint = self.compute_answer_fingerprint()
+            self.retriever = MMRRetriever(
+                vectors=vectors,
+                documents=documents,
+                embeddings=embeddings,
+                k=1  # A single focused excerpt keeps the prompt short
             )
             
             print("✅ AmbedkarGPT System Ready!")
@@ -126,9 +519,80 @@ ANSWER:"""
             print(f"❌ System setup failed: {e}")
             return False
     
+    def schedule_prefetch(self, partial_question):
+        """Restart the typing-pause timer that prefetches documents for partial_question"""
+        self.cancel_prefetch()
+        job = SimpleNamespace(
+            key=partial_question.strip().lower(),
+            started=False,
+            cancelled=False,
+            docs=None,
+            done=threading.Event()
+        )
+        timer = threading.Timer(PREFETCH_DELAY, self.prefetch, args=(partial_question, job))
+        timer.daemon = True
+        with self.prefetch_lock:
+            self.prefetch_job = job
+            self.prefetch_timer = timer
+        timer.start()
+    
+    def cancel_prefetch(self):
+        """Drop a prefetch that hasn't started yet; one already running is left to finish"""
+        with self.prefetch_lock:
+            job, timer = self.prefetch_job, self.prefetch_timer
+            self.prefetch_timer = None
+            if job and not job.started:
+                job.cancelled = True
+                self.prefetch_job = None
+        if timer:
+            timer.cancel()
+    
+    def prefetch(self, partial_question, job):
+        """Retrieve documents for text the user is still typing"""
+        with self.prefetch_lock:
+            if job.cancelled:
+                return
+            job.started = True
+        try:
+            # Partial text is not worth keeping in the saved query cache
+            job.docs = self.retriever.invoke(partial_question, cache_query=False)
+        except Exception:
+            pass  # Prefetching is best effort; ask_question retrieves again
+        finally:
+            job.done.set()
+    
+    def take_prefetched(self, question):
+        """Return prefetched documents for this exact question, waiting if still running"""
+        self.cancel_prefetch()
+        with self.prefetch_lock:
+            job, self.prefetch_job = self.prefetch_job, None
+        if job is None or job.key != question.strip().lower():
+            return None
+        job.done.wait()
+        return job.docs
+    
+    def read_cached_answer(self, cache_key):
+        """Look up a stored answer, keeping the cache file open only for the read"""
+        try:
+            with shelve.open(self.answer_cache_path, flag='r') as answer_cache:
+                return answer_cache.get(cache_key)
+        except Exception:
+            # No cache file yet is the normal first-run case, not worth a warning
+            if os.path.exists(self.answer_cache_path) or glob.glob(self.answer_cache_path + ".*"):
+                print("⚠️ Answer cache unavailable, generating a fresh answer")
+            return None
+    
+    def store_answer(self, cache_key, answer):
+        """Save an answer for replay; a busy or damaged cache file is only a warning"""
+        try:
+            with shelve.open(self.answer_cache_path) as answer_cache:
+                answer_cache[cache_key] = answer
+        except Exception as e:
+            print(f"⚠️ Could not save answer to cache: {e}")
+    
     def ask_question(self, question):
         """Ask a question about Ambedkar's speech"""
-        if not self.qa_chain:
+        if not self.llm:
             print("⚠️ Please initialize the system first")
             return
         
@@ -136,34 +600,72 @@ ANSWER:"""
         print("🔍 Analyzing Ambedkar's speech...")
         
         try:
-            result = self.qa_chain({"query": question})
-            print(f"\n💡 Answer: {result['result']}")
-            print("\n" + "─" * 60)
+            # Answers from other prompts, settings or corpora live under other keys
+            cache_key = f"{self.answer_fingerprint}|{question.strip().lower()}"
+            cached_answer = self.read_cached_answer(cache_key)
+            if cached_answer is not None:
+                print(f"\n💡 Answer: {cached_answer}")
+                print("\n" + "─" * 60)
+                return
+            
+            docs = self.take_prefetched(question)
+            if docs is None:
+                docs = self.retriever.invoke(question)
+            context = "\n\n".join(doc.page_content for doc in docs)
+            prompt = PROMPT_TEMPLATE.format(context=context, question=question)
+            
+            print("\n💡 Answer: ", end="", flush=True)
+            answer = self.llm.invoke(prompt)
+            print("\n\n" + "─" * 60)
+            self.store_answer(cache_key, answer)
         except Exception as e:
             print(f"❌ Error finding answer: {e}")
 
 def check_ollama():
-    """Check if Ollama is running with Mistral"""
+    """Check if Ollama is running with Mistral and the embedding model"""
+    try:
+        import requests
+    except ImportError as e:
+        print(f"❌ Import error: {e}")
+        return False
+    
     try:
-        import subprocess
         print("🔍 Checking Ollama setup...")
-        result = subprocess.run(
-            ["ollama", "list"], 
-            capture_output=True, 
-            text=True, 
-            shell=True,
-            timeout=10
-        )
-        if "mistral" in result.stdout:
-            print("✅ Mistral model available")
-            return True
-        else:
-            print("❌ Mistral model not found. Please run: ollama pull mistral")
+        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=2)
+        response.raise_for_status()
+        names = [model["name"] for model in response.json().get("models", [])]
+        
+        def is_installed(model):
+            # Untagged names are listed by Ollama as "<name>:latest"
+            return any(name == model or name.startswith(model + ":") for name in names)
+        
+        if not is_installed(LLM_MODEL):
+            print(f"❌ Mistral model not found. Please run: ollama pull {LLM_MODEL}")
+            return False
+        if not is_installed(EMBEDDING_MODEL):
+            print(f"❌ Embedding model not found. Please run: ollama pull {EMBEDDING_MODEL}")
             return False
+        print("✅ Mistral and embedding models available")
+        return True
     except Exception as e:
         print(f"❌ Ollama not accessible: {e}")
         return False
 
+def create_question_prompt(qa_system):
+    """Build a prompt that prefetches retrieval whenever the user pauses typing"""
+    from prompt_toolkit import PromptSession
+    
+    session = PromptSession()
+    
+    def on_text_changed(buffer):
+        if buffer.text.strip():
+            qa_system.schedule_prefetch(buffer.text)
+        else:
+            qa_system.cancel_prefetch()
+    
+    session.default_buffer.on_text_changed += on_text_changed
+    return session
+
 def display_welcome():
     """Display welcome message and instructions"""
     print("=" * 70)
@@ -214,10 +716,13 @@ def main():
     print("=" * 70)
     
     display_example_questions()
+    prompt_session = create_question_prompt(qa_system)
     
     while True:
         try:
-            question = input("\n🎯 Your question: ").strip()
+            question = prompt_session.prompt("\n🎯 Your question: ").strip()
+            # Enter was pressed, so a prefetch still waiting on the typing pause is moot
+            qa_system.cancel_prefetch()
             
             if question.lower() in ['quit', 'exit', 'q']:
                 print("\n🙏 Thank you for exploring Ambedkar's ideas!")